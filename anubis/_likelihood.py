@@ -30,21 +30,28 @@ def _population_log_likelihood(ll, amm, idx = None, joint = False):
     else:
         start_shared = len(ll)
     # Check bounds
-    if not np.all([amm.par_bounds[idx][i][0] < ll[start+i] < amm.par_bounds[idx][i][1] for i in range(len(ll[start:finish]))]):
+    pars = ll[start:finish]
+    if not np.all((amm.par_bounds[idx][:, 0] < pars) & (pars < amm.par_bounds[idx][:, 1])):
         return -np.inf
     if amm.selfunc is not None:
         amm.components[comp_idx]._compute_alpha_factor([ll[start:finish]], [ll[start_shared:]], amm.n_draws_norm)
         alpha_factor = amm.components[comp_idx].alpha
         if not np.isfinite(alpha_factor):
             return -np.inf
-    # Points
-    id_points = [pt for pt in range(int(np.sum(amm.n_pts))) if amm.assignations[pt] == comp_idx]
+    # Points (grouped by component in AMM.build_mixture)
+    pts = amm.assigned_pts[comp_idx]
+    if len(pts) == 0:
+        return 0.
     # Hierarchical
     if amm.hierarchical:
-        L_vector = np.array([np.mean(amm.components[comp_idx]._model(amm.stored_pts[id]['samples'], ll[start:finish], ll[start_shared:])) for id in id_points])
+        L_vector = np.array([np.mean(amm.components[comp_idx]._model(ev['samples'], pars, ll[start_shared:])) for ev in pts])
     else:
-        L_vector = np.array([amm.components[comp_idx]._model(amm.stored_pts[id], ll[start:finish], ll[start_shared:]) for id in id_points])
-    logL = np.sum(np.log(L_vector)) - len(id_points)*np.log(alpha_factor)
+        # All the points at once (one value per point: the selection function is flattened in par_model._selfunc)
+        L_vector = np.reshape(amm.components[comp_idx]._model(pts, pars, ll[start_shared:]), -1)
+        # Models that are not vectorised over the points
+        if len(L_vector) != len(pts):
+            L_vector = np.array([amm.components[comp_idx]._model(pt, pars, ll[start_shared:]) for pt in pts[:, np.newaxis]])
+    logL = np.sum(np.log(L_vector)) - len(pts)*np.log(alpha_factor)
     if np.isfinite(logL):
         return logL
     else:
@@ -0,0 +1,86 @@
+import numpy as np
+from numba import njit
+
+@njit(cache = True, fastmath = {'reassoc', 'contract'})
+def _logsumexp(a):
+    """
+    Log of the sum of the exponentials of the entries of a 1d array.
+    Returns -inf if all the entries are -inf (no nan). Only reassociation is allowed as fast-math flag, so that -inf entries are still handled exactly.
+
+    Arguments:
+        np.ndarray a: 1d array
+
+    Returns:
+        double: log(sum(exp(a)))
+    """
+    a_max = -np.inf
+    for v in a:
+        if v > a_max:
+            a_max = v
+    if not a_max > -np.inf or a_max == np.inf:
+        return a_max
+    s = 0.
+    for v in a:
+        s += np.exp(v - a_max)
+    return a_max + np.log(s)
+
+@njit(cache = True)
+def _categorical_from_logits(scores, log_counts, gumbel):
+    """
+    Draws the component to assign a point to, given the log predictive likelihood of each component and the Dirichlet prior.
+    Uses the Gumbel-max trick, so that the logits never need to be normalised.
+
+    Arguments:
+        np.ndarray scores:     log predictive likelihoods
+        np.ndarray log_counts: log(gamma0 + n_pts) for each component
+        np.ndarray gumbel:     standard Gumbel noise, one value per component
+
+    Returns:
+        int: component id
+    """
+    logits = scores + log_counts
+    # No component can explain the point: draw from the prior
+    if not np.max(logits) > -np.inf:
+        logits = log_counts
+    return np.argmax(logits + gumbel)
+
+@njit(cache = True)
+def _update_weights(n_pts, gamma0):
+    """
+    Expected weights of the components given the number of points assigned to each of them.
+
+    Arguments:
+        np.ndarray n_pts:  number of points assigned to each component
+        np.ndarray gamma0: Dirichlet Distribution prior
+
+    Returns:
+        np.ndarray: weights
+    """
+    w = n_pts + gamma0
+    return w/np.sum(w)
+
+@njit(cache = True)
+def _log_predictive_dp(log_pred, N, log_pred_new, alpha, n_pts):
+    """
+    Log predictive likelihood of a Dirichlet Process mixture, given the log predictive likelihood of each cluster.
+    Empty clusters (N < 1) do not contribute.
+
+    Arguments:
+        np.ndarray log_pred: log predictive likelihood of each cluster
+        np.ndarray N:        number of points assigned to each cluster
+        double log_pred_new: log predictive likelihood of a new cluster
+        double alpha:        concentration parameter
+        double n_pts:        total number of points
+
+    Returns:
+        double: log predictive likelihood
+    """
+    log_denom   = np.log(n_pts + alpha)
+    scores      = np.empty(len(log_pred) + 1)
+    for i in range(len(log_pred)):
+        if N[i] < 1:
+            scores[i] = -np.inf
+        else:
+            scores[i] = log_pred[i] + np.log(N[i]) - log_denom
+    scores[-1]  = log_pred_new + np.log(alpha) - log_denom
+    return _logsumexp(scores)
@@ -39,6 +39,7 @@ class worker:
                        selection_function = None,
                        inj_pdf            = None,
                        n_total_inj        = None,
+                       vectorised         = None,
                        MC_draws_pars      = 1e3,
                        MC_draws_norm      = 5e3,
                        MC_steps           = 1e3,
@@ -96,6 +97,7 @@ class worker:
                             inj_pdf            = inj_pdf,
                             n_total_inj        = n_total_inj,
                             n_steps_mcmc       = MC_steps,
+                            vectorised         = vectorised,
                             )
     
     def run_event(self, pars):
@@ -367,6 +369,7 @@ def main():
         ray.init(num_cpus = options.n_parallel)
         # Reconstruction
         pool = ActorPool([worker.remote(models             = [model['model'] for model in models],
+                                        vectorised         = [model.get('vectorised', False) for model in models],
                                         bounds             = options.bounds,
                                         pars               = pars,
                                         shared_pars        = shared_pars,
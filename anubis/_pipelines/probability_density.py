@@ -29,6 +29,7 @@ class worker:
                        selection_function = None,
                        inj_pdf            = None,
                        n_total_inj        = None,
+                       vectorised         = None,
                        MC_draws_pars      = 1e3,
                        MC_draws_norm      = 5e3,
                        MC_steps           = 1e3,
@@ -67,6 +68,7 @@ class worker:
                            inj_pdf            = inj_pdf,
                            n_total_inj        = n_total_inj,
                            n_steps_mcmc       = MC_steps,
+                           vectorised         = vectorised,
                            )
         self.samples = np.copy(samples)
         self.samples.setflags(write = True)
@@ -227,6 +229,7 @@ def main():
             # Actual analysis
             desc = name + ' ({0}/{1})'.format(i+1, len(files))
             pool = ActorPool([worker.remote(models             = [model['model'] for model in models],
+                                            vectorised         = [model.get('vectorised', False) for model in models],
                                             bounds             = options.bounds,
                                             pars               = pars,
                                             shared_pars        = shared_pars,
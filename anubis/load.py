@@ -1,13 +1,68 @@
 import numpy as np
+import pandas as pd
+import os
 import json
+import orjson
+import pickle
 import warnings
-import importlib
+import importlib.util
+from collections import Counter
+from copy import deepcopy
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
+from numpy.lib.recfunctions import structured_to_unstructured, unstructured_to_structured
 from figaro.mixture import mixture
 from figaro.load import load_data as load_data_figaro, save_density as save_density_figaro, load_density as load_density_figaro
 from anubis.utils import get_samples_and_weights, get_labels
 from anubis.exceptions import ANUBISException
 from anubis.mixture import het_mixture, par_model, nonpar_model, uniform
+from anubis.models import get_model, builtin_models
+
+# Entries of the nonparametric draws stored as lists in the json file
+_nonpar_array_keys = {'means', 'covs', 'inv_covs', 'det_covs', 'w', 'bounds'}
+
+def _load_table(file):
+    """
+    Loads a whitespace-separated table with a commented header (as produced by np.savetxt) into a structured array.
+    Equivalent to np.genfromtxt(file, names = True), but parsed with the pandas C engine (with round-trip float parsing, so that the values match exactly).
+    If an up-to-date binary copy of the table (.npy, see _save_table) is available, it is memory-mapped instead.
+
+    Arguments:
+        str or Path file: file with the table
+
+    Returns:
+        np.ndarray: structured array with columns accessible by name
+    """
+    file     = Path(file)
+    file_npy = file.with_suffix('.npy')
+    try:
+        if file_npy.stat().st_mtime_ns >= file.stat().st_mtime_ns:
+            return np.load(file_npy, mmap_mode = 'r')
+    except FileNotFoundError:
+        pass
+    with open(file, 'r') as f:
+        names = f.readline().lstrip('# ').split()
+        df    = pd.read_csv(f, sep = r'\s+', header = None, names = names, dtype = np.float64, engine = 'c', float_precision = 'round_trip')
+    return df.to_records(index = False)
+
+def _save_table(file, table, names):
+    """
+    Saves a 2d array to a whitespace-separated table with a commented header, in the same format as np.savetxt.
+    The rows are formatted with the pandas C writer.
+    A binary copy (structured array with the same column names) is saved alongside with .npy extension, to be loaded without parsing.
+
+    Arguments:
+        str or Path file:  output file
+        np.ndarray table:  2d array to save
+        list-of-str names: column names
+    """
+    file  = Path(file)
+    table = np.atleast_2d(table).astype(np.float64)
+    with open(file, 'w') as f:
+        f.write('# ' + ' '.join(names) + '\n')
+        pd.DataFrame(table).to_csv(f, sep = ' ', float_format = '%.18e', header = False, index = False)
+    np.save(file.with_suffix('.npy'), unstructured_to_structured(table, dtype = np.dtype([(n, np.float64) for n in names])))
 
 def save_density(draws, models, folder = '.', name = 'density'):
     """
@@ -24,16 +79,16 @@ def save_density(draws, models, folder = '.', name = 'density'):
     labels  = get_labels(draws, 'save', models)
     dict_info = {'augment':            draws[0].augment,
                  'probit':             draws[0].probit,
-                 'bounds':             draws[0].bounds.tolist(),
+                 'bounds':             draws[0].bounds,
                  'hierarchical':       draws[0].hierarchical,
                  'n_shared_pars':      draws[0].n_shared_pars,
                  'selection_function': draws[0].selfunc is not None
                 }
     # Save samples
-    np.savetxt(Path(folder, name+'_samples.txt'), samples, header = ' '.join(labels))
+    _save_table(Path(folder, name+'_samples.txt'), samples, labels)
     # Save mixture info
-    with open(Path(folder, name+'_info.json'), 'w') as f:
-        json.dump(json.dumps(dict_info), f)
+    with open(Path(folder, name+'_info.json'), 'wb') as f:
+        f.write(orjson.dumps(dict_info, option = orjson.OPT_SERIALIZE_NUMPY))
     # Save non-parametric model
     if draws[0].augment:
         mixtures = [d.models[0].mixture for d in draws]
@@ -44,85 +99,145 @@ def save_density(draws, models, folder = '.', name = 'density'):
         model_names = [m['name'] for m in models]
         if draws[0].augment:
             model_names = ['np'] + model_names
-        np.savetxt(Path(folder, name+'_alphas.txt'), alphas, header = ' '.join(model_names))
+        _save_table(Path(folder, name+'_alphas.txt'), alphas, model_names)
     
-def load_density(folder, name, models, selection_function = None, make_comp = True):
+def load_density(folder, name, models, selection_function = None, make_comp = True, use_cache = False):
     """
     Loads a list of anubis.mixture.het_mixture instances from path.
+    If use_cache is True, the arrays read from the files (samples, weights, alphas and non-parametric draws) are cached in a pickle file (name_arrays.pkl) next to the other files, which is used as long as it is more recent than all of them (models file included, if given).
+    Only data are cached: the models are always built with the callables passed by the caller.
 
     Arguments:
         :str or Path folder: path with draws (file or folder)
+        :bool use_cache:     whether to use (and update) the cached arrays. Use only with trusted folders, as the cache is unpickled
 
     Returns
         :list: anubis.het_mixture object instances
     """
-    # Reimport numpy (issues with try/except)
-    import numpy as np
     path = Path(folder).resolve()
+    source_files = [Path(path, name+suffix) for suffix in ['_samples.txt', '_info.json', '_nonpar.json', '_alphas.txt']]
+    if isinstance(models, (str, Path)):
+        source_files.append(Path(models))
+        models, _, _, _, _ = load_models(models)
+    # Cached arrays
+    file_cache = Path(path, name+'_arrays.pkl')
+    cache_key  = ([(model['name'], list(model.get('par_names', []))) for model in models], selection_function is not None)
+    data       = None
+    if use_cache and file_cache.exists():
+        last_modified = max([f.stat().st_mtime_ns for f in source_files if f.exists()], default = None)
+        if last_modified is not None and file_cache.stat().st_mtime_ns >= last_modified:
+            try:
+                with open(file_cache, 'rb') as f:
+                    key, data = pickle.load(f)
+                if key != cache_key:
+                    data = None
+            except (pickle.UnpicklingError, ImportError, AttributeError, EOFError, ValueError, OSError):
+                data = None
+    if data is None:
+        data = _load_density_arrays(path, name, models, selection_function)
+        # Store arrays for later calls
+        if use_cache:
+            try:
+                with open(file_cache, 'wb') as f:
+                    pickle.dump((cache_key, data), f, protocol = 5)
+            except (pickle.PicklingError, TypeError, AttributeError, OSError):
+                try:
+                    file_cache.unlink(missing_ok = True)
+                except OSError:
+                    pass
+                warnings.warn("The arrays could not be cached.")
+    info = data['info']
+    if not info['selection_function'] and selection_function is not None:
+        print("Selection function ignored.")
+    # Join list of parameter names
+    for model, s in zip(models, data['par_samples']):
+        model['samples'] = s
+    # Quantities that do not change from draw to draw
+    par_callables  = [model['model'] for model in models]
+    par_vectorised = [model.get('vectorised', False) for model in models]
+    nonpar_kwargs = {'hierarchical':       info['hierarchical'],
+                     'selection_function': selection_function,
+                     }
+    par_kwargs    = {'bounds':             info['bounds'],
+                     'probit':             info['probit'],
+                     'hierarchical':       info['hierarchical'],
+                     'selection_function': selection_function,
+                     }
+    mix_kwargs    = {'bounds':        info['bounds'],
+                     'augment':       info['augment'],
+                     'hierarchical':  info['hierarchical'],
+                     'selfunc':       selection_function,
+                     'n_shared_pars': info['n_shared_pars'],
+                     }
+    # Build draws
+    n_draws = len(data['weights'])
+    draws   = [None]*n_draws
+    for i in range(n_draws):
+        mix_models = []
+        if info['augment']:
+            np_model = nonpar_model(mixture = data['nonpar'][i], **nonpar_kwargs)
+            mix_models.append(np_model)
+        mix_models += [par_model(model = m, pars = s[i], norm = a[i], vectorised = v, **par_kwargs) for m, s, a, v in zip(par_callables, data['par_samples'], data['par_alphas'], par_vectorised)]
+        hmix = het_mixture(models = mix_models, weights = data['weights'][i], **mix_kwargs)
+        draws[i] = hmix
+    return draws
+
+def _load_density_arrays(path, name, models, selection_function):
+    """
+    Reads the files written by save_density and extracts the arrays needed to rebuild the draws.
+    
+    Arguments:
+        Path path:                   folder with draws
+        str name:                    name of the files
+        list-of-dict models:         models
+        callable selection_function: selection function (if used)
+    
+    Returns:
+        dict: info, weights, parameter samples and alphas of each model, non-parametric draws
+    """
     file_samples = Path(path, name+'_samples.txt')
     file_info    = Path(path, name+'_info.json')
+    nonpar_draws = None
     try:
-        with open(file_info, 'r') as fjson:
-            info = json.loads(json.load(fjson))
-        samples = np.genfromtxt(file_samples, names = True)
+        with open(file_info, 'rb') as fjson:
+            info = orjson.loads(fjson.read())
+        # Files written by older versions are double-encoded
+        if isinstance(info, str):
+            info = orjson.loads(info)
+        samples = _load_table(file_samples)
         if info['augment']:
             file_nonpar  = Path(path, name+'_nonpar.json')
             nonpar_draws = load_density_nonparametric(file_nonpar, make_comp = True)
         if selection_function is not None:
             file_alphas = Path(path, name+'_alphas.txt')
-            alphas = np.genfromtxt(file_alphas, names = True)
-        else:
-            ai = np.ones(len(samples))
-            alphas = {model['name']: ai for model in models}
-            if info['augment']:
-                alphas['np'] = ai
+            alphas = _load_table(file_alphas)
     except FileNotFoundError:
         raise ANUBISException("{0} files not found. Please provide them or re-run the inference.".format(name))
     if info['selection_function'] and selection_function is None:
         raise ANUBISException("This inference was run with a selection function. Please provide it.")
-    if not info['selection_function'] and selection_function is not None:
-        print("Selection function ignored.")
     info['bounds'] = np.atleast_2d(info['bounds'])
-    if isinstance(models, (str, Path)):
-        models, _, _, _, _ = load_models(models)
-    # Join list of parameter names
+    # Parameter samples of each model (plain ndarray copies, not np.memmap views, so that they can be pickled)
+    par_samples = []
     for model in models:
-        model['samples'] = np.array([samples[l] for l in model['par_names']]).T
+        if len(model['par_names']) > 0:
+            par_samples.append(structured_to_unstructured(samples[model['par_names']], dtype = np.float64, copy = True))
+        else:
+            par_samples.append(np.empty((len(samples), 0)))
     # Weights
     weight_labels = ['w_{}'.format(model['name']) for model in models]
     if info['augment']:
         weight_labels = ['w_np'] + weight_labels
-    weights = np.array([samples[w] for w in weight_labels]).T
-    # Build draws
-    draws = []
-    for i in range(len(samples)):
-        mix_models = []
-        if info['augment']:
-            np = nonpar_model(mixture            = nonpar_draws[i],
-                              hierarchical       = info['hierarchical'],
-                              selection_function = selection_function,
-                              )
-            mix_models.append(np)
-        for model in models:
-            m = par_model(model              = model['model'],
-                          pars               = model['samples'][i],
-                          bounds             = info['bounds'],
-                          probit             = info['probit'],
-                          hierarchical       = info['hierarchical'],
-                          selection_function = selection_function,
-                          norm               = alphas[model['name']][i],
-                          )
-            mix_models.append(m)
-        hmix = het_mixture(models        = mix_models,
-                           weights       = weights[i],
-                           bounds        = info['bounds'],
-                           augment       = info['augment'],
-                           hierarchical  = info['hierarchical'],
-                           selfunc       = selection_function,
-                           n_shared_pars = info['n_shared_pars'],
-                           )
-        draws.append(hmix)
-    return draws
+    weights = structured_to_unstructured(samples[weight_labels], dtype = np.float64, copy = True)
+    if selection_function is not None:
+        par_alphas = structured_to_unstructured(alphas[[model['name'] for model in models]], dtype = np.float64, copy = True).T
+    else:
+        par_alphas = np.ones((len(models), len(samples)))
+    return {'info':        info,
+            'weights':     weights,
+            'par_samples': par_samples,
+            'par_alphas':  par_alphas,
+            'nonpar':      nonpar_draws,
+            }
 
 def load_density_nonparametric(file, make_comp = True):
     """
@@ -139,18 +254,12 @@ def load_density_nonparametric(file, make_comp = True):
         dictjson = json.loads(json.load(fjson))[0]
     draws = []
     for dict_ in dictjson:
-        mix = False
-        if 'log_w' in dict_.keys():
-            dict_.pop('log_w')
-            mix = True
-        for key in dict_.keys():
-            value = dict_[key]
-            if isinstance(value, list):
-                dict_[key] = np.array(value)
-            if key == 'probit':
-                dict_[key] = bool(value)
-            if key == 'bounds':
-                dict_[key] = np.atleast_2d(value)
+        mix = 'log_w' in dict_.keys()
+        dict_.pop('log_w', None)
+        for key in _nonpar_array_keys & dict_.keys():
+            dict_[key] = np.asarray(dict_[key])
+        dict_['bounds'] = dict_['bounds'].reshape(-1, 2)
+        dict_['probit'] = bool(dict_['probit'])
         if mix:
             instance = mixture(**dict_, make_comp = make_comp)
         else:
@@ -185,9 +294,27 @@ def load_data(path_samples, path_mixtures, *args, **kwargs):
     samples, names = load_data_figaro(path_samples, *args, **kwargs)
     with warnings.catch_warnings():
         warnings.simplefilter("ignore", category=UserWarning)
-        mixtures = [load_density_figaro(Path(path_mixtures, 'draws_'+ev+'.json'), make_comp = False) for ev in names]
+        # Each event is an independent file: read and parse them concurrently
+        with ThreadPoolExecutor(max_workers = min(32, 2*(os.cpu_count() or 1))) as executor:
+            mixtures = list(executor.map(lambda ev: load_density_figaro(Path(path_mixtures, 'draws_'+ev+'.json'), make_comp = False), names))
     return [[ss, mm] for ss, mm in zip(samples, mixtures)], names
 
+def _import_module(file):
+    """
+    Imports a python module from file. Caching is left to the callers (see _load_models and _load_injected_density).
+    
+    Arguments:
+        str or Path file: path to python file
+    
+    Returns:
+        module: imported module
+    """
+    file   = Path(file)
+    spec   = importlib.util.spec_from_file_location(file.parts[-1].split('.')[0], file)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
 def load_models(file_models):
     """
     Load a list of dictionaries with parametric models
@@ -199,11 +326,24 @@ def load_models(file_models):
         list-of-dict models: list of dictionaries storing models
         
     """
-    file_models      = Path(file_models)
-    models_file_name = file_models.parts[-1].split('.')[0]
-    spec             = importlib.util.spec_from_file_location(models_file_name, file_models)
-    models_module    = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(models_module)
+    file_models = Path(file_models).resolve()
+    models, pars, shared_pars, par_bounds, shared_par_bounds = _load_models(str(file_models), file_models.stat().st_mtime_ns)
+    # Copy the model dictionaries (not the callables they store) so that callers can add keys without altering the cached ones
+    return [dict(model) for model in models], deepcopy(pars), deepcopy(shared_pars), deepcopy(par_bounds), deepcopy(shared_par_bounds)
+
+@lru_cache
+def _load_models(file_models, mtime):
+    """
+    Cached implementation of load_models. The modification time is part of the key, so that edits to the file are picked up.
+    
+    Arguments:
+        str file_models: resolved path to file with models definition
+        int mtime:       modification time of the file (ns)
+    
+    Returns:
+        see load_models
+    """
+    models_module = _import_module(file_models)
     try:
         models = models_module.models
     except ImportError:
@@ -212,6 +352,10 @@ def load_models(file_models):
     all_parameters = []
     all_bounds     = []
     for model in models:
+        # Builtin models can be selected by name (and are always vectorised)
+        if isinstance(model['model'], str) and model['model'] in builtin_models:
+            model.setdefault('vectorised', True)
+        model['model'] = get_model(model['model'])
         if ('parameters' in model.keys()) and ('par_bounds' in model.keys()):
             raise ANUBISException("Please provide either parameter values or parameter bounds for the model {}".format(model['name']))
         if 'par_names' in model.keys():
@@ -229,13 +373,12 @@ def load_models(file_models):
     # Find shared parameters to infer
     flatten_names  = [name for names in all_par_names for name in names]
     flatten_bounds = [tuple(bounds) for par_bounds in all_bounds for bounds in par_bounds]
-    # Identify items appearing once
-    d_names = {}
-    for i in flatten_names: d_names[i] = i in d_names
-    set_names         = list(dict.fromkeys(flatten_names).keys())
-    set_bounds        = [[flatten_bounds[i] for i, name in enumerate(flatten_names) if name == par][0] for par in set_names]
-    unique_names      = [k for k in flatten_names if not d_names[k]]
-    shared_par_bounds = [list(x) for x, k in zip(set_bounds, set_names) if d_names[k]]
+    # Count occurrences and store the first bounds provided for each parameter (in order of appearance)
+    count_names  = Counter(flatten_names)
+    first_bounds = {}
+    for name, bounds in zip(flatten_names, flatten_bounds): first_bounds.setdefault(name, bounds)
+    unique_names      = {k for k, n in count_names.items() if n == 1}
+    shared_par_bounds = [list(x) for k, x in first_bounds.items() if count_names[k] > 1]
     # Build list of unique bounds to return
     par_bounds = []
     for model in models:
@@ -249,12 +392,10 @@ def load_models(file_models):
         shared_par_bounds = None
     # Fixed parameters appearing once
     flatten_pars  = [par for pars in all_parameters for par in pars]
-    # Identify items appearing once
-    d_pars = {}
-    for i in flatten_pars: d_pars[i] = i in d_pars
-    set_pars    = list(dict.fromkeys(flatten_pars).keys())
-    unique_pars = [k for k in flatten_pars if not d_pars[k]]
-    shared_pars = [k for k in set_pars if d_pars[k]]
+    # Identify items appearing once (Counter preserves the order of appearance)
+    count_pars  = Counter(flatten_pars)
+    unique_pars = {k for k, n in count_pars.items() if n == 1}
+    shared_pars = [k for k, n in count_pars.items() if n > 1]
     # Build list of unique bounds to return
     pars = []
     for model in models:
@@ -276,10 +417,22 @@ def load_injected_density(file_density):
         callable: parametric part, if available
         callable: residual part to be accounted for by the non-parametric method
     """
-    inj_file_name = Path(file_density).parts[-1].split('.')[0]
-    spec = importlib.util.spec_from_file_location(inj_file_name, file_density)
-    inj_module = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(inj_module)
+    file_density = Path(file_density).resolve()
+    return _load_injected_density(str(file_density), file_density.stat().st_mtime_ns)
+
+@lru_cache
+def _load_injected_density(file_density, mtime):
+    """
+    Cached implementation of load_injected_density. The modification time is part of the key, so that edits to the file are picked up.
+    
+    Arguments:
+        str file_density: resolved path to file with injected densities
+        int mtime:        modification time of the file (ns)
+    
+    Returns:
+        see load_injected_density
+    """
+    inj_module  = _import_module(file_density)
     inj_density = inj_module.density
     try:
         inj_parametric = inj_module.density_parametric
@@ -1,13 +1,16 @@
 import numpy as np
+import pickle
+from concurrent.futures import ProcessPoolExecutor
 from scipy.stats import dirichlet, qmc, multivariate_normal as mn
-from scipy.special import logsumexp
+from scipy.special import gammaln
 from emcee import EnsembleSampler
 from emcee.moves import GaussianMove, StretchMove
 
 from anubis.exceptions import ANUBISException
+from anubis.models import get_model, is_builtin
 from anubis._likelihood import _population_log_likelihood, _joint_population_log_likelihood
+from anubis._numba_functions import _categorical_from_logits, _update_weights, _log_predictive_dp, _logsumexp
 from figaro.mixture import DPGMM, HDPGMM, mixture, _update_alpha
-from figaro.decorators import probit
 from figaro.transform import transform_to_probit
 from figaro.utils import rejection_sampler
 from figaro._likelihood import evaluate_mixture_MC_draws, evaluate_mixture_MC_draws_1d
@@ -15,6 +18,113 @@ from figaro._numba_functions import logsumexp_jit
 
 np.seterr(divide = 'ignore')
 
+# Memory limit (bytes) for the parametric log-likelihoods evaluated in advance, and number of evaluations per chunk (see AMM._precompute_logL)
+_max_precomputed_logL  = 2**30
+_precompute_chunk_size = 2**20
+
+# Inference instance and samples of the current worker process (see AMM.draw_many)
+_worker_state = {}
+
+def _init_worker(mix, samples, make_comp):
+    """
+    Stores the inference instance and the samples in the worker process.
+    
+    Arguments:
+        AMM mix:            inference instance
+        iterable samples:   samples set
+        bool make_comp:     whether to build the components of the non-parametric mixture
+    """
+    _worker_state['mix']       = mix
+    _worker_state['samples']   = samples
+    _worker_state['make_comp'] = make_comp
+
+def _draw_in_worker(seed):
+    """
+    Runs an independent chain in the worker process and returns its draw.
+    
+    Arguments:
+        int seed: seed of the chain
+    
+    Returns:
+        het_mixture: the inferred mixture
+    """
+    # The figaro internals draw from the global numpy state, which forked workers would otherwise share: it belongs to the worker process, not to the caller
+    np.random.seed(seed)
+    _worker_state['mix']._rng = np.random.default_rng(seed)
+    return _worker_state['mix'].density_from_samples(_worker_state['samples'], make_comp = _worker_state['make_comp'])
+
+def _weighted_sum(weights, funcs, x):
+    """
+    Weighted sum of the functions evaluated at point(s) x.
+    The evaluations are stored as rows of a single buffer, which is then contracted with the weights.
+    
+    Arguments:
+        np.ndarray weights: weights
+        iterable funcs:     functions to evaluate (e.g. the pdf methods of the models)
+        np.ndarray x:       point(s) to evaluate the functions at
+    
+    Returns:
+        np.ndarray: weighted sum
+    """
+    funcs  = list(funcs)
+    vals   = funcs[0](x)
+    buf    = np.empty((len(funcs),) + np.shape(vals))
+    buf[0] = vals
+    for j, f in enumerate(funcs[1:], start = 1):
+        buf[j] = f(x)
+    return np.tensordot(np.asarray(weights, dtype = np.float64), buf, axes = 1)
+
+def _log_pdf(p):
+    """
+    Log of pdf values, evaluated in a single pass with -inf wherever the pdf is not positive (nan included).
+    
+    Arguments:
+        np.ndarray p: pdf values
+    
+    Returns:
+        np.ndarray: log pdf values
+    """
+    p = np.asarray(p, dtype = np.float64)
+    return np.log(p, where = p > 0, out = np.full_like(p, -np.inf))
+
+def _log_predictive_clusters(dpgmm, x):
+    """
+    Log predictive likelihood of sample x for all the clusters of a DPGMM at once.
+    Same student-t as figaro.mixture.DPGMM._log_predictive_likelihood, with the NIW update and the density evaluated for all the clusters in batched linear algebra calls.
+    Empty clusters get -inf.
+    
+    Arguments:
+        figaro.mixture.DPGMM dpgmm: DPGMM instance
+        np.ndarray x:               sample
+    
+    Returns:
+        np.ndarray: log predictive likelihood of each cluster
+    """
+    clusters = dpgmm.mixture[:dpgmm.n_cl]
+    dim      = dpgmm.dim
+    N        = np.array([ss.N for ss in clusters], dtype = np.float64)
+    means    = np.array([np.reshape(ss.mean, -1) for ss in clusters])
+    S        = np.array([ss.S for ss in clusters])
+    k, nu, L = dpgmm.prior.k, dpgmm.prior.nu, dpgmm.prior.L
+    mu       = np.reshape(dpgmm.prior.mu, -1)
+    # NIW update
+    k_n      = k + N
+    mu_n     = (k*mu + N[:, np.newaxis]*means)/k_n[:, np.newaxis]
+    dev      = means - mu
+    L_n      = L + S + (k*N/k_n)[:, np.newaxis, np.newaxis]*dev[:, :, np.newaxis]*dev[:, np.newaxis, :]
+    # Student-t parameters
+    df       = nu + N - dim + 1
+    t_shape  = L_n*((k_n + 1.)/(k_n*df))[:, np.newaxis, np.newaxis]
+    try:
+        chol = np.linalg.cholesky(t_shape)
+    except np.linalg.LinAlgError:
+        return np.array([dpgmm._log_predictive_likelihood(x, ss) if ss.N >= 1 else -np.inf for ss in clusters])
+    z        = np.linalg.solve(chol, (np.reshape(x, -1) - mu_n)[:, :, np.newaxis])[:, :, 0]
+    maha     = np.sum(z**2, axis = -1)
+    logdet   = 2*np.sum(np.log(np.diagonal(chol, axis1 = 1, axis2 = 2)), axis = -1)
+    log_pred = gammaln(0.5*(df + dim)) - gammaln(0.5*df) - 0.5*dim*np.log(df*np.pi) - 0.5*logdet - 0.5*(df + dim)*np.log1p(maha/df)
+    return np.where(N >= 1, log_pred, -np.inf)
+
 class uniform:
     """
     Class with the same methods as figaro.mixture.mixture (in particular, pdf and marginalise)
@@ -145,12 +255,13 @@ class par_model:
     Class to store a parametric model.
     
     Arguments:
-        callable model:    model pdf
+        callable model:    model pdf (or name of a builtin model, see anubis.models)
         iterable pars:     parameters of the model
         np.ndarray bounds: bounds (FIGARO)
         bool probit:       whether to use the probit transformation or not (FIGARO compatibility)
         callable selfunc:  selection function
         float norm:        normalisation constant for the observed distribution
+        bool vectorised:   whether the model accepts arrays of parameters, broadcast against x (always True for the builtin models)
     
     Returns:
         par_model: instance of model class
@@ -164,8 +275,10 @@ class par_model:
                        inj_pdf = None,
                        n_total_inj = None,
                        norm = None,
+                       vectorised = False,
                        ):
-        self.model        = model
+        self.model        = get_model(model)
+        self.vectorised   = bool(vectorised) or is_builtin(self.model)
         self.hierarchical = hierarchical
         self.pars         = pars
         self.bounds       = np.atleast_2d(bounds)
@@ -185,10 +298,11 @@ class par_model:
     def _selfunc(func):
         """
         Applies the selection function to to the intrinsic distribution.
+        The selection function is flattened (one value per point), so that column-shaped outputs do not broadcast against the points axis.
         """
         def observed_model(self, x, *args):
             if not self.hierarchical and self.selfunc is not None:
-                return func(self, x, *args)*self.selfunc(x)
+                return func(self, x, *args)*np.reshape(self.selfunc(x), -1)
             else:
                 return func(self, x, *args)
         return observed_model
@@ -265,7 +379,7 @@ class par_model:
         Returns:
             np.ndarray: p_intr.pdf(x)
         """
-        return self.model(x, *self.pars)/self.alpha
+        return self.model(x, *self.pars).flatten()/self.alpha
     
     def pdf_pars(self, x, pars, shared_pars):
         """
@@ -276,15 +390,51 @@ class par_model:
             np.ndarray pars:        array of parameters
             np.ndarray shared_pars: array of shared parameters
         Returns:
-            np.ndarray: p_intr.pdf(x|theta)*p_obs(x)/norm
-        """
+            np.ndarray: p_intr.pdf(x|theta)*p_obs(x)/norm, with shape (n_pars, n_pts)
+        """
+        vals = None
+        # Vectorised models only: all the draws in a single call (if the shapes allow it)
+        if self.vectorised:
+            try:
+                vals = self._model_batch(x, pars, shared_pars)
+            except (ValueError, TypeError, IndexError):
+                pass
+        if vals is None:
+            vals = np.reshape([self._model(x, p, sp) for p, sp in zip(pars, shared_pars)], (len(pars), -1))
         if self.alpha is not None:
             if hasattr(self.alpha, '__iter__'):
-                return np.array([self._model(x, p, sp)/a for p, sp, a in zip(pars, shared_pars, self.alpha)])
+                return vals/np.reshape(self.alpha, (-1, 1))
             else:
-                return np.array([self._model(x, p, sp)/self.alpha for p, sp in zip(pars, shared_pars)])
+                return vals/self.alpha
         else:
-            return np.array([self._model(x, p, sp) for p, sp in zip(pars, shared_pars)])
+            return vals
+    
+    @_selfunc
+    def _model_batch(self, x, pars, shared_pars):
+        """
+        Decorated intrinsic distribution evaluated at a single point for all the realisations of the parameters theta at once.
+        The parameters are passed to the model as columns, relying on broadcasting: raises ValueError if this is not possible.
+        
+        Arguments:
+            np.ndarray x:           point to evaluate the mixture at
+            np.ndarray pars:        2d array of parameters
+            np.ndarray shared_pars: 2d array of shared parameters
+        
+        Returns:
+            np.ndarray: p_intr.pdf(x|theta)*p_obs(x), with shape (n_pars, 1)
+        """
+        x           = np.atleast_2d(x)
+        pars        = np.asarray(pars, dtype = np.float64)
+        shared_pars = np.asarray(shared_pars, dtype = np.float64)
+        if len(x) > 1 or pars.ndim != 2 or shared_pars.ndim != 2:
+            raise ValueError
+        all_pars = np.hstack([pars, shared_pars])
+        if all_pars.shape[1] == 0:
+            raise ValueError
+        vals = self.model(x, *all_pars.T[:, :, np.newaxis])
+        if np.size(vals) != len(all_pars):
+            raise ValueError
+        return np.reshape(vals, (-1, 1))
     
     @_selfunc
     def _model(self, x, pars, shared_pars):
@@ -375,7 +525,7 @@ class het_mixture:
         Returns:
             np.ndarray: het_mixture.pdf(x)
         """
-        return np.array([wi*mi.pdf(x) for wi, mi in zip(self.intrinsic_weights, self.models)]).sum(axis = 0)
+        return _weighted_sum(self.intrinsic_weights, [mi.pdf for mi in self.models], x)
     
     def logpdf(self, x):
         """
@@ -399,7 +549,7 @@ class het_mixture:
         Returns:
             np.ndarray: het_mixture.pdf(x)
         """
-        return np.array([wi*mi.pdf_observed(x) for wi, mi in zip(self.observed_weights, self.models)]).sum(axis = 0)
+        return _weighted_sum(self.observed_weights, [mi.pdf_observed for mi in self.models], x)
     
     def logpdf_observed(self, x):
         """
@@ -423,7 +573,7 @@ class het_mixture:
         Returns:
             np.ndarray: het_mixture.pdf(x)
         """
-        return np.array([wi*mi.pdf(x)/self.norm_parametric for wi, mi in zip(self.parametric_weights, self.models[self.augment:])]).sum(axis = 0)
+        return _weighted_sum(self.parametric_weights/self.norm_parametric, [mi.pdf for mi in self.models[self.augment:]], x)
 
     def logpdf_parametric(self, x):
         """
@@ -436,6 +586,43 @@ class het_mixture:
             np.ndarray: het_mixture.logpdf(x)
         """
         return np.array([wi+mi.logpdf(x)-self.log_norm_parametric for wi, mi in zip(self.log_parametric_weights, self.models[self.augment:])]).sum(axis = 0)
+    
+    @staticmethod
+    def pdf_parametric_batch(x, draws):
+        """
+        Evaluate the parametric models of many draws at the same 1d point(s) x.
+        For vectorised models, the parameters of all draws are broadcast against x, so that each model is called once: otherwise, the draws are evaluated one by one.
+        
+        Arguments:
+            np.ndarray x:   1d point(s) to evaluate the mixtures at
+            iterable draws: het_mixture instances sharing the same models
+        
+        Returns:
+            np.ndarray: het_mixture.pdf_parametric(x) for each draw
+        """
+        x       = np.atleast_1d(x)
+        augment = draws[0].augment
+        shape   = (len(draws), len(x))
+        weights = np.array([d.parametric_weights/d.norm_parametric for d in draws])
+        pdfs    = np.empty((len(draws[0].models) - augment,) + shape)
+        if not all(m.vectorised for m in draws[0].models[augment:]):
+            return np.array([d.pdf_parametric(x) for d in draws])
+        try:
+            for j, m in enumerate(draws[0].models[augment:]):
+                if not np.all([d.models[j+augment].model is m.model for d in draws]):
+                    raise ValueError
+                pars = np.array([d.models[j+augment].pars for d in draws], dtype = np.float64).reshape(len(draws), -1)
+                if pars.shape[1] == 0:
+                    p = np.broadcast_to(np.reshape(m.model(x), (1, -1)), shape)
+                else:
+                    p = m.model(x[np.newaxis, :], *pars.T[:, :, np.newaxis])
+                if np.shape(p) != shape:
+                    raise ValueError
+                pdfs[j] = p
+        except (ValueError, TypeError, IndexError):
+            return np.array([d.pdf_parametric(x) for d in draws])
+        # Weighted sum over models for each draw
+        return np.einsum('dj,jdx->dx', weights, pdfs)
 
 #-----------------#
 # Inference class #
@@ -463,6 +650,8 @@ class AMM:
         int n_reassignments:        number of reassignments
         np.ndarray norm:            normalisation constant for the parametric observed distributions. Use None if not available
         int n_steps_mcmc:           number of steps for the mcmc sampler before drawing a sample
+        iterable vectorised:        whether each model accepts arrays of parameters, broadcast against x (builtin models always do). Default False for all models
+        int seed:                   seed for the random number generator of the Gibbs sampler (sample order, assignments, parameter draws, mcmc samplers and mixture weights). If None, it is drawn from the global numpy state, so that np.random.seed still makes runs reproducible. The figaro DPGMM/HDPGMM internals use their own generators and are not covered
     
     Returns:
         AMM: instance of AMM class
@@ -486,6 +675,8 @@ class AMM:
                        n_reassignments    = None,
                        norm               = None,
                        n_steps_mcmc       = None,
+                       vectorised         = None,
+                       seed               = None,
                        ):
         # Settings
         self.bounds       = np.atleast_2d(bounds)
@@ -496,6 +687,10 @@ class AMM:
         self.inj_pdf      = inj_pdf
         self.n_total_inj  = n_total_inj
         self.hierarchical = False
+        # Without a seed, the generator follows the global numpy state (np.random.seed)
+        if seed is None:
+            seed = np.random.randint(2**32, dtype = np.uint32)
+        self._rng         = np.random.default_rng(seed)
         # Parametric models
         if pars is None:
             pars = [[] for _ in models]
@@ -519,6 +714,15 @@ class AMM:
                 self.n_draws_pars = int(1e3)
         else:
             self.shared_par_bounds = None
+        # Bounds of all the free parameters, stacked so that the draws are made in a single call
+        free_bounds = []
+        if self.par_bounds is not None:
+            free_bounds += [b for b in self.par_bounds if b is not None]
+        if self.shared_par_bounds is not None:
+            free_bounds.append(self.shared_par_bounds)
+        if len(free_bounds) > 0:
+            self.draw_bounds = np.concatenate(free_bounds)
+            self.draw_splits = np.cumsum([len(b) for b in free_bounds])[:-1]
         if self.selfunc is not None:
             if n_draws_norm is not None:
                 self.n_draws_norm = int(n_draws_norm)
@@ -528,7 +732,9 @@ class AMM:
             self.norm   = [None for _ in models]
         else:
             self.norm   = norm
-        self.par_models = [par_model(mod, list(p) + list(shared_pars), bounds, probit, hierarchical = False, selection_function = self.selfunc, inj_pdf = self.inj_pdf, n_total_inj = n_total_inj, norm = n) for mod, p, n in zip(models, pars, self.norm)]
+        if vectorised is None:
+            vectorised  = [False for _ in models]
+        self.par_models = [par_model(mod, list(p) + list(shared_pars), bounds, probit, hierarchical = False, selection_function = self.selfunc, inj_pdf = self.inj_pdf, n_total_inj = n_total_inj, norm = n, vectorised = v) for mod, p, n, v in zip(models, pars, self.norm, vectorised)]
         # DPGMM initialisation (if required)
         if self.augment:
             self.nonpar = DPGMM(bounds     = bounds,
@@ -544,13 +750,16 @@ class AMM:
             self.n_components = len(models)
         # Gibbs sampler
         self.n_reassignments  = n_reassignments
+        # Buffers for the scores and individual log Likelihood values of the point being assigned
+        self._scores_buf      = np.empty(self.n_components)
+        self._vals_buf        = np.zeros(shape = (self.n_components, self.n_draws_pars))
         if gamma0 is None:
             self.gamma0 = np.ones(self.n_components)
         else:
             if not hasattr(gamma0, '__iter__'):
                 self.gamma0 = np.ones(self.n_components)*gamma0
             elif len(gamma0) == self.n_components:
-                self.gamma0 = gamma0
+                self.gamma0 = np.array(gamma0, dtype = np.float64)
             else:
                 raise Exception("gamma0 must be an array with {0} components or a float.".format(self.n_components))
         if n_steps_mcmc is None:
@@ -588,7 +797,7 @@ class AMM:
         Returns:
             np.ndarray: mixture.pdf(x)
         """
-        return np.array([wi*mi.pdf(x) for wi, mi in zip(self.weights, self.models)]).sum(axis = 0)
+        return _weighted_sum(self.weights, [mi.pdf for mi in self.components], x)
     
     def __call__(self, x):
         return self.pdf(x)
@@ -602,29 +811,112 @@ class AMM:
         """
         self.n_pts             = np.zeros(self.n_components)
         self.weights           = self.gamma0/np.sum(self.gamma0)
+        self._log_counts       = np.log(self.gamma0)
+        self.log_total_p       = np.zeros(shape = (self.n_components, self.n_draws_pars))
+        self.n_inf_logL        = np.zeros(shape = (self.n_components, self.n_draws_pars), dtype = int)
+        self.n_logL            = np.zeros(self.n_components, dtype = int)
+        self.log_norm          = np.full(self.n_components, np.nan)
         self.stored_pts        = {}
         self.stored_pts_probit = {}
         self.assignations      = {}
+        self._gumbels          = np.empty(shape = (0, self.n_components))
+        self._gumbel_idx       = 0
         # Draw new parameter realisations
         if self.par_bounds is not None or self.shared_par_bounds is not None:
             self.evaluated_logL       = {}
+            self.precomputed_logL     = {}
+            # One joint sequence over all the free parameters, split into per-model blocks
+            draws                     = iter(np.split(qmc.scale(qmc.Halton(len(self.draw_bounds), seed = self._rng).random(self.n_draws_pars), *self.draw_bounds.T), self.draw_splits, axis = 1))
             if self.par_bounds is not None:
-                self.par_draws        = [qmc.scale(qmc.Halton(len(b)).random(self.n_draws_pars), *b.T) if b is not None else None for b in self.par_bounds]
+                self.par_draws        = [next(draws) if b is not None else None for b in self.par_bounds]
             else:
-                self.par_draws        = [[[] for _ in range(self.n_draws_pars)] for _ in range(len(self.components[self.augment:]))]
+                self.par_draws        = [np.empty((self.n_draws_pars, 0)) for _ in range(len(self.components[self.augment:]))]
             if self.shared_par_bounds is not None:
-                self.shared_par_draws = qmc.scale(qmc.Halton(len(self.shared_par_bounds)).random(self.n_draws_pars), *self.shared_par_bounds.T)
+                self.shared_par_draws = next(draws)
             else:
-                self.shared_par_draws = [[] for _ in range(self.n_draws_pars)]
+                self.shared_par_draws = np.empty((self.n_draws_pars, 0))
+            # The mcmc samplers keep their own RandomState: reseed them from the Gibbs sampler generator
+            for sampler in (self.samplers if self.shared_par_bounds is None else [self.sampler]):
+                sampler.random_state = np.random.RandomState(self._rng.integers(2**32)).get_state()
         else:
-            self.par_draws        = [[[] for _ in range(self.n_draws_pars)] for _ in range(len(self.components[self.augment:]))]
-            self.shared_par_draws = [[] for _ in range(self.n_draws_pars)]
+            self.par_draws        = [np.empty((self.n_draws_pars, 0)) for _ in range(len(self.components[self.augment:]))]
+            self.shared_par_draws = np.empty((self.n_draws_pars, 0))
         if self.selfunc is not None:
             [m._compute_alpha_factor(p, self.shared_par_draws, self.n_draws_norm) for m, p, n in zip(self.components[self.augment:], self.par_draws, self.norm) if n is None]
         if self.augment:
             self.nonpar.initialise()
             self.ids_nonpar = {}
 
+    def _add_to_count(self, id, n):
+        """
+        Updates the number of points assigned to a component and the corresponding log(gamma0 + n_pts) term.
+        
+        Arguments:
+            int id: component id
+            int n:  number of points to add (negative to remove)
+        """
+        self.n_pts[id]      += n
+        self._log_counts[id] = np.log(self.gamma0[id] + self.n_pts[id])
+    
+    def _draw_gumbels(self, n):
+        """
+        Pre-generates the Gumbel noise for the next n assignments (see _categorical_from_logits).
+        
+        Arguments:
+            int n: number of assignments
+        """
+        self._gumbels    = self._rng.gumbel(size = (int(n), self.n_components))
+        self._gumbel_idx = 0
+    
+    def _next_gumbel(self):
+        """
+        Gumbel noise for the current assignment. If the pre-generated noise is exhausted, a new block of the same size is drawn.
+        
+        Returns:
+            np.ndarray: Gumbel noise, one value per component
+        """
+        if self._gumbel_idx == len(self._gumbels):
+            self._draw_gumbels(max(len(self._gumbels), 1))
+        g                 = self._gumbels[self._gumbel_idx]
+        self._gumbel_idx += 1
+        return g
+    
+    def _update_log_total_p(self, id, log_p, n):
+        """
+        Adds (n = 1) or removes (n = -1) the individual log Likelihood values of a point to the running sum of component id.
+        The -inf values are counted separately, so that removing a point never produces nan.
+        
+        Arguments:
+            int id:           component id
+            np.ndarray log_p: individual log Likelihood values for theta_id
+            int n:            1 to add the point, -1 to remove it
+        """
+        is_inf                = np.isneginf(log_p)
+        self.log_total_p[id] += n*np.where(is_inf, 0., log_p)
+        self.n_inf_logL[id]  += n*is_inf
+        self.n_logL[id]      += n
+        self.log_norm[id]     = np.nan
+    
+    def _get_log_total_p(self, i = None):
+        """
+        Sum of the individual log Likelihood values of the points assigned to component i and log of its sum over theta_i.
+        
+        Arguments:
+            int i: component id. If None, the sums of all the components are returned as a 2d array (without the logsumexp)
+        
+        Returns:
+            np.ndarray: sum of the individual log Likelihood values for theta_i
+            double:     logsumexp of the above
+        """
+        if i is None:
+            return np.where(self.n_inf_logL > 0, -np.inf, self.log_total_p)
+        if self.n_logL[i] == 0:
+            return np.zeros(1), 0.
+        log_total_p = np.where(self.n_inf_logL[i] > 0, -np.inf, self.log_total_p[i])
+        if np.isnan(self.log_norm[i]):
+            self.log_norm[i] = _logsumexp(log_total_p)
+        return log_total_p, self.log_norm[i]
+    
     def _assign_to_component(self, x, x_probit, pt_id, id_nonpar = None, reassign = False):
         """
         Assign the sample x to an existing cluster or to a new cluster according to the marginal distribution of cluster assignment.
@@ -635,15 +927,10 @@ class AMM:
             int id_nonpar: FIGARO id for the point
             bool reassign: wheter the point is new or is being reassigned
         """
-        scores             = np.zeros(self.n_components)
-        vals               = np.zeros(shape = (self.n_components, self.n_draws_pars))
         for i in range(self.n_components):
-            score, vals[i] = self._log_predictive_likelihood(x, i, pt_id)
-            scores[i]      = score + np.log(self.gamma0[i] + self.n_pts[i])
-        scores             = np.exp(scores - logsumexp(scores))
-        id                 = np.random.choice(self.n_components, p = scores)
-        self.n_pts[id]    += 1
-        self.weights       = (self.n_pts + self.gamma0)/np.sum(self.n_pts + self.gamma0)
+            self._scores_buf[i] = self._log_predictive_likelihood(x, x_probit, i, pt_id, out = self._vals_buf[i])
+        id                 = _categorical_from_logits(self._scores_buf, self._log_counts, self._next_gumbel())
+        self._add_to_count(id, 1)
         # If DPGMM, updates mixture
         if self.augment and id == 0:
             if id_nonpar is None:
@@ -653,7 +940,8 @@ class AMM:
                 self._reassign_point_nonpar(x_probit, id_nonpar)
         # Parameter estimation
         elif self.par_bounds is not None:
-            self.evaluated_logL[pt_id] = vals
+            self.evaluated_logL[pt_id] = self._vals_buf.copy()
+            self._update_log_total_p(id, self.evaluated_logL[pt_id][id], 1)
         self.assignations[pt_id]       = int(id)
 
     def _reassign_point_nonpar(self, x, id_nonpar):
@@ -667,68 +955,90 @@ class AMM:
         self.nonpar._assign_to_cluster(x, id_nonpar)
         self.nonpar.alpha = _update_alpha(self.nonpar.alpha, self.nonpar.n_pts, (np.array(self.nonpar.N_list) > 0).sum(), self.nonpar.alpha_0)
 
-    def _log_predictive_likelihood(self, x, i, pt_id):
+    def _log_predictive_likelihood(self, x, x_probit, i, pt_id, out):
         """
         Compute log likelihood of drawing sample x from component i given the samples that are already assigned to that component marginalised over the component parameters.
         
         Arguments:
-            np.ndarray x: sample
-            int i:        component id
-            pt_id:        ANUBIS point ID
+            np.ndarray x:        sample
+            np.ndarray x_probit: sample in probit space (same as x if the probit transformation is not used)
+            int i:               component id
+            pt_id:               ANUBIS point ID
+            np.ndarray out:      buffer for the individual log Likelihood values for theta_i
         
         Returns:
-            double:     marginal log Likelihood
-            np.ndarray: individual log Likelihood values for theta_i
+            double: marginal log Likelihood
         """
         # Non-parametric
         if self.augment and i == 0:
-            return self._log_predictive_mixture(x), np.zeros(self.n_draws_pars)
+            out[:] = 0.
+            return self._log_predictive_mixture(x_probit)
         # Parametric
         else:
             # Fixed parameters or parameterless model
             if (self.par_bounds is None or self.par_bounds[i - self.augment] is None) and self.shared_par_bounds is None:
-                return np.log(self.components[i].pdf(x)), np.zeros(self.n_draws_pars)
+                out[:] = 0.
+                return np.log(self.components[i].pdf(x))
             # Marginalisation over parameters
             else:
                 i_p = i - self.augment
-                if not pt_id in list(self.evaluated_logL.keys()):
-                    log_p = np.log(self.components[i].pdf_pars(x, self.par_draws[i_p], self.shared_par_draws)).flatten()
-                else:
+                if pt_id in self.evaluated_logL:
                     log_p = self.evaluated_logL[pt_id][i]
-                log_total_p = np.atleast_1d(np.sum([self.evaluated_logL[pt][i] for pt in range(int(np.sum(self.n_pts))) if self.assignations[pt] == i], axis = 0))
-                denom       = logsumexp(log_total_p) - np.log(self.n_draws_pars)
-                v           = logsumexp(log_p + log_total_p) - np.log(self.n_draws_pars)
-                return np.nan_to_num(v - denom, nan = -np.inf, neginf = -np.inf), log_p
+                elif i in self.precomputed_logL and 0 <= pt_id - self.precomputed_logL[i][0] < len(self.precomputed_logL[i][1]):
+                    pt_0, logL = self.precomputed_logL[i]
+                    log_p      = logL[pt_id - pt_0]
+                else:
+                    log_p = _log_pdf(self.components[i].pdf_pars(x, self.par_draws[i_p], self.shared_par_draws)).flatten()
+                out[:]                = log_p
+                log_total_p, log_norm = self._get_log_total_p(i)
+                denom                 = log_norm - np.log(self.n_draws_pars)
+                v                     = _logsumexp(log_p + log_total_p) - np.log(self.n_draws_pars)
+                return np.nan_to_num(v - denom, nan = -np.inf, neginf = -np.inf)
     
-    @probit
     def _log_predictive_mixture(self, x):
         """
         Compute log likelihood for non-parametric mixture (mixture of predictive likelihood)
+        The sample is expected in probit space (if the probit transformation is used), as it is stored by add_new_point.
         
         Arguments:
-            np.ndarray x: sample
+            np.ndarray x: sample (probit space)
         
         Returns:
             double: log Likelihood
         """
-        scores = np.zeros(self.nonpar.n_cl + 1)
-        for j, i in enumerate(list(np.arange(self.nonpar.n_cl)) + ["new"]):
-            if i == "new":
-                ss = None
-                scores[j] = -np.log(self.volume)
-            else:
-                ss = self.nonpar.mixture[i]
-                if ss.N < 1:
-                    scores[j] = 0.
-                else:
-                    scores[j] = self.nonpar._log_predictive_likelihood(x, ss)
-            if ss is None:
-                scores[j] += np.log(self.nonpar.alpha) - np.log(self.nonpar.n_pts + self.nonpar.alpha)
-            elif ss.N < 1:
-                scores[j]  = -np.inf
-            else:
-                scores[j] += np.log(ss.N) - np.log(self.nonpar.n_pts + self.nonpar.alpha)
-        return logsumexp(scores)
+        if self.nonpar.n_cl == 0:
+            log_pred = np.zeros(0)
+        else:
+            log_pred = _log_predictive_clusters(self.nonpar, x)
+        N        = np.array([ss.N for ss in self.nonpar.mixture[:self.nonpar.n_cl]], dtype = np.float64)
+        return _log_predictive_dp(log_pred, N, -np.log(self.volume), self.nonpar.alpha, self.nonpar.n_pts)
+    
+    def _precompute_logL(self, samples, order):
+        """
+        Evaluates the parametric models at all the samples for all the parameter draws, before the samples are added one by one.
+        The samples are evaluated in chunks, written straight into a single (n_samples, n_draws) array per model.
+        If the arrays would take more than _max_precomputed_logL bytes, nothing is stored and the models are evaluated point by point.
+        
+        Arguments:
+            np.ndarray samples: samples set
+            np.ndarray order:   indices of the samples, in the order in which they will be added
+        """
+        models = [i for i in range(self.augment, self.n_components) if not ((self.par_bounds is None or self.par_bounds[i - self.augment] is None) and self.shared_par_bounds is None)]
+        if len(models)*len(samples)*self.n_draws_pars*8 > _max_precomputed_logL:
+            return
+        pt_0       = int(np.sum(self.n_pts))
+        samples    = np.reshape(samples, (len(samples), -1))
+        chunk_size = max(1, _precompute_chunk_size//self.n_draws_pars)
+        for i in models:
+            i_p  = i - self.augment
+            logL = np.empty((len(samples), self.n_draws_pars))
+            for j in range(0, len(samples), chunk_size):
+                block    = logL[j:j+chunk_size]
+                block[:] = self.components[i].pdf_pars(samples[order[j:j+chunk_size]], self.par_draws[i_p], self.shared_par_draws).T
+                mask     = block > 0
+                np.log(block, where = mask, out = block)
+                block[~mask] = -np.inf
+            self.precomputed_logL[i] = (pt_0, logL)
     
     def add_new_point(self, x):
         """
@@ -738,14 +1048,24 @@ class AMM:
             np.ndarray x: sample
         """
         x = np.atleast_2d(x)
-        self.stored_pts[int(np.sum(self.n_pts))] = x
         if self.probit:
             x_probit = transform_to_probit(x, self.bounds)
-            self.stored_pts_probit[int(np.sum(self.n_pts))] = x_probit
         else:
             x_probit = x
-            self.stored_pts_probit[int(np.sum(self.n_pts))] = x
-        self._assign_to_component(x, x_probit, pt_id = int(np.sum(self.n_pts)))
+        self._add_new_point(x, x_probit)
+    
+    def _add_new_point(self, x, x_probit):
+        """
+        Stores and assigns a new sample, already shaped as a 2d row and transformed to probit space.
+        
+        Arguments:
+            np.ndarray x:        sample
+            np.ndarray x_probit: sample in probit space (same as x if the probit transformation is not used)
+        """
+        pt_id                         = int(np.sum(self.n_pts))
+        self.stored_pts[pt_id]        = x
+        self.stored_pts_probit[pt_id] = x_probit
+        self._assign_to_component(x, x_probit, pt_id = pt_id)
     
     def density_from_samples(self, samples, make_comp = True):
         """
@@ -757,16 +1077,35 @@ class AMM:
         Returns:
             het_mixture: the inferred mixture
         """
-        np.random.shuffle(samples)
+        # The samples are visited in random order: only the indices are shuffled, the samples are neither moved nor modified
+        order = self._rng.permutation(len(samples))
         if self.n_reassignments is None:
             n_reassignments = 5*len(samples)
         else:
             n_reassignments = self.n_reassignments
-        for s in samples:
-            self.add_new_point(s)
+        # All the Gumbel noise for the run (one assignment per sample, then the reassignments)
+        if self.n_components > 1:
+            self._draw_gumbels(2*len(samples) + int(n_reassignments))
+        else:
+            self._draw_gumbels(len(samples))
+        # Events carry different sets of samples: only single samples are evaluated in advance
+        if not self.hierarchical and (self.par_bounds is not None or self.shared_par_bounds is not None):
+            self._precompute_logL(samples, order)
+        if self.hierarchical:
+            for i in order:
+                self.add_new_point(samples[i])
+        else:
+            # Rows of the (transformed) samples array are passed as views, with no per-point reshaping
+            samples = np.reshape(samples, (len(samples), -1))
+            if self.probit:
+                samples_probit = transform_to_probit(samples, self.bounds)
+            else:
+                samples_probit = samples
+            for i in order:
+                self._add_new_point(samples[i:i+1], samples_probit[i:i+1])
         # Random Gibbs walk (if required)
         if self.n_components > 1:
-            for id in np.random.choice(int(np.sum(self.n_pts)), size = int(n_reassignments), replace = True):
+            for id in self._rng.integers(int(np.sum(self.n_pts)), size = int(n_reassignments)):
                 self._reassign_point(int(id))
             # Reassign all points once
             for id in range(int(np.sum(self.n_pts))):
@@ -775,6 +1114,42 @@ class AMM:
         self.initialise()
         return d
     
+    def draw_many(self, samples, n_draws, n_processes = None, make_comp = True, seed = None):
+        """
+        Reconstruct the probability density several times from the same set of samples.
+        Each draw comes from an independent chain: the chains are run in parallel, each worker process with its own copy of the instance.
+        The instance (models, selection function, injected density) must be picklable, unless n_processes = 1.
+        
+        Arguments:
+            iterable samples: samples set
+            int n_draws:      number of draws
+            int n_processes:  number of worker processes. Default is the number of available CPUs. With 1, the chains are run one after the other in this process
+            bool make_comp:   whether to build the components of the non-parametric mixture
+            int seed:         seed for the chains. If None, it is drawn from the global numpy state
+        
+        Returns:
+            list: the inferred mixtures
+        """
+        if seed is None:
+            seed = np.random.randint(2**32, dtype = np.uint32)
+        seeds = np.random.SeedSequence(seed).generate_state(int(n_draws))
+        if n_processes == 1:
+            rng   = self._rng
+            draws = []
+            try:
+                for s in seeds:
+                    self._rng = np.random.default_rng(s)
+                    draws.append(self.density_from_samples(samples, make_comp = make_comp))
+            finally:
+                self._rng = rng
+            return draws
+        try:
+            pickle.dumps((self, samples))
+        except (pickle.PicklingError, AttributeError, TypeError) as e:
+            raise ANUBISException("The inference instance cannot be sent to the worker processes ({0}). Define the models at module level or use n_processes = 1".format(e))
+        with ProcessPoolExecutor(max_workers = n_processes, initializer = _init_worker, initargs = (self, samples, make_comp)) as executor:
+            return list(executor.map(_draw_in_worker, seeds))
+    
     def _reassign_point(self, id):
         """
         Update the probability density reconstruction reassigining an existing sample
@@ -786,13 +1161,28 @@ class AMM:
         x_probit              = self.stored_pts_probit[id]
         cid                   = self.assignations[id]
         id_nonpar             = None
-        self.n_pts[cid]      -= 1
+        self._add_to_count(cid, -1)
         self.assignations[id] = None
         if self.augment and cid == 0:
             id_nonpar  = self.ids_nonpar[id]
             self.nonpar._remove_from_cluster(x_probit, self.nonpar.assignations[id_nonpar])
+        elif self.par_bounds is not None:
+            self._update_log_total_p(cid, self.evaluated_logL[id][cid], -1)
         self._assign_to_component(x, x_probit, id, id_nonpar = id_nonpar, reassign = True)
     
+    def _group_assigned_points(self):
+        """
+        Groups the stored points by parametric component, so that the population likelihood does not have to look them up at every MCMC step.
+        Samples are stacked in a single array, events are kept in a list.
+        """
+        self.assigned_pts = {}
+        for i in range(self.augment, self.n_components):
+            pts = [self.stored_pts[pt] for pt in range(int(np.sum(self.n_pts))) if self.assignations[pt] == i]
+            if self.hierarchical or len(pts) == 0:
+                self.assigned_pts[i] = pts
+            else:
+                self.assigned_pts[i] = np.concatenate(pts)
+    
     def build_mixture(self, make_comp = True):
         """
         Instances a mixture class representing the inferred distribution
@@ -800,17 +1190,18 @@ class AMM:
         Returns:
             het_mixture: the inferred distribution
         """
+        self.weights = _update_weights(self.n_pts, self.gamma0)
         # Parameter estimation
         if self.par_bounds is not None or self.shared_par_bounds is not None:
+            self._group_assigned_points()
             # If no parameters are shared among models, the parameter space is separable
             if self.par_bounds is not None and self.shared_par_bounds is None:
-                par_vals = []
+                par_vals    = []
+                log_total_p = self._get_log_total_p()
                 # Individual subspaces
                 for i in range(len(self.par_models)):
                     if self.par_draws[i] is not None:
-                        i_p                  = i + self.augment
-                        log_total_p          = np.atleast_1d(np.sum([self.evaluated_logL[pt][i_p] for pt in range(int(np.sum(self.n_pts))) if self.assignations[pt] == i_p], axis = 0))
-                        max_p                = self.par_draws[i][np.where(log_total_p == log_total_p.max())].flatten()
+                        max_p                = self.par_draws[i][np.argmax(log_total_p[i + self.augment])].flatten()
                         self.model_to_sample = i
                         if self.first_run:
                             initial_state = np.mean(self.par_bounds[i], axis = 1).flatten()
@@ -829,8 +1220,8 @@ class AMM:
             # In presence of shared parameters, the space is not separable anymore
             else:
                 # Joint distribution
-                log_total_p  = np.array([self.evaluated_logL[pt][self.assignations[pt]] for pt in range(int(np.sum(self.n_pts))) if pt in self.evaluated_logL.keys()]).sum(axis = 0)
-                max_idx      = np.where(log_total_p == log_total_p.max())
+                log_total_p  = self._get_log_total_p()[self.augment:].sum(axis = 0)
+                max_idx      = np.argmax(log_total_p)
                 all_par      = [dd[max_idx].flatten() for dd in self.par_draws] + [self.shared_par_draws[max_idx].flatten()]
                 max_p        = np.array([par for par_vec in all_par for par in par_vec])
                 if self.first_run:
@@ -858,7 +1249,7 @@ class AMM:
                     par_vals = [[] for _ in range(len(self.par_models))]
                 shared_par_vals = pt[-len(self.shared_par_bounds):]
             # Build parametric models
-            par_models = [par_model(m.model, list(par) + list(shared_par_vals), self.bounds, self.probit, hierarchical = True, selection_function = self.selfunc, inj_pdf = self.inj_pdf, n_total_inj = self.n_total_inj, norm = n) for m, par, n in zip(self.par_models, par_vals, self.norm)]
+            par_models = [par_model(m.model, list(par) + list(shared_par_vals), self.bounds, self.probit, hierarchical = True, selection_function = self.selfunc, inj_pdf = self.inj_pdf, n_total_inj = self.n_total_inj, norm = n, vectorised = m.vectorised) for m, par, n in zip(self.par_models, par_vals, self.norm)]
             # Renormalise the models in presence of selection effects
             if self.selfunc is not None:
                 [m._compute_alpha_factor([p], [shared_par_vals], self.n_draws_norm) for m, p, n in zip(par_models, par_vals, self.norm) if n is None]
@@ -886,7 +1277,7 @@ class AMM:
             n_pts = np.nan_to_num(self.n_pts/np.array(alphas), neginf = 0., posinf = 0., nan = 0.)
         else:
             n_pts = self.n_pts
-        return het_mixture(models, dirichlet(n_pts+self.gamma0).rvs()[0], self.bounds, self.augment, selfunc = self.selfunc, n_shared_pars = n_shared_pars, hierarchical = self.hierarchical)
+        return het_mixture(models, dirichlet(n_pts+self.gamma0).rvs(random_state = self._rng)[0], self.bounds, self.augment, selfunc = self.selfunc, n_shared_pars = n_shared_pars, hierarchical = self.hierarchical)
         
 class HAMM(AMM):
     """
@@ -910,6 +1301,8 @@ class HAMM(AMM):
         bool augment:               whether to include the non-parametric channel
         int n_reassignments:        number of reassignments. Default is reassign 5 times the number of available samples
         np.ndarray norm:            normalisation constant for the parametric observed distributions. Use None if not available
+        iterable vectorised:        whether each model accepts arrays of parameters, broadcast against x (builtin models always do). Default False for all models
+        int seed:                   seed for the random number generator of the Gibbs sampler (sample order, assignments, parameter draws, mcmc samplers and mixture weights). If None, it is drawn from the global numpy state, so that np.random.seed still makes runs reproducible. The figaro DPGMM/HDPGMM internals use their own generators and are not covered
     
     Returns:
         HAMM: instance of HAMM class
@@ -934,6 +1327,8 @@ class HAMM(AMM):
                        n_reassignments    = None,
                        norm               = None,
                        n_steps_mcmc       = None,
+                       vectorised         = None,
+                       seed               = None,
                        ):
         # Initialise the parent class
         super().__init__(models             = models,
@@ -955,6 +1350,8 @@ class HAMM(AMM):
                          n_reassignments    = n_reassignments,
                          norm               = norm,
                          n_steps_mcmc       = n_steps_mcmc,
+                         vectorised         = vectorised,
+                         seed               = seed,
                          )
         # Setting the hierarchical flag to True
         self.hierarchical = True
@@ -972,28 +1369,58 @@ class HAMM(AMM):
                                       total_injections   = n_total_inj,
                                       )
             self.components  = [self.nonpar] + self.par_models
+    
+    def initialise(self, prior_pars = None):
+        """
+        Initialise the mixture to initial conditions.
+
+        Arguments:
+            iterable prior_pars: NIW prior parameters (k, L, nu, mu) for the (H)DPGMM. If None, old parameters are kept
+        """
+        super().initialise(prior_pars = prior_pars)
+        self.log_norms_D = {}
+    
+    def _log_norm_D(self, i, logL_D):
+        """
+        logsumexp of the log Likelihood denominator of cluster i.
+        figaro replaces logL_D with a new array whenever the cluster is updated, hence the value is cached as long as the array is the same object.
+        
+        Arguments:
+            int i:             cluster id
+            np.ndarray logL_D: log Likelihood denominator of the cluster
         
-    def _log_predictive_likelihood(self, x, i, pt_id):
+        Returns:
+            double: logsumexp of logL_D
+        """
+        cached = self.log_norms_D.get(i)
+        if cached is None or cached[0] is not logL_D:
+            cached              = (logL_D, _logsumexp(logL_D))
+            self.log_norms_D[i] = cached
+        return cached[1]
+        
+    def _log_predictive_likelihood(self, x, i, pt_id, out):
         """
         Compute log likelihood of drawing the event x from component i given the events that are already assigned to that component marginalised over the component parameters.
         
         Arguments:
-            dict x: event
-            int i:  component id
-            pt_id:  ANUBIS point ID
+            dict x:         event
+            int i:          component id
+            pt_id:          ANUBIS point ID
+            np.ndarray out: buffer for the individual log Likelihood values for theta_i
         
         Returns:
-            double:     marginal log Likelihood
-            np.ndarray: individual log Likelihood values for theta_i
+            double: marginal log Likelihood
         """
         # Non-parametric
         if self.augment and i == 0:
-            return self._log_predictive_mixture(x), np.zeros(self.n_draws_pars)
+            out[:] = 0.
+            return self._log_predictive_mixture(x)
         # Parametric
         else:
             # Fixed parameters or parameter-less model
             if (self.par_bounds is None or self.par_bounds[i - self.augment] is None) and self.shared_par_bounds is None:
-                return np.log(np.mean(self.components[i].pdf(x['samples']))), np.zeros(self.n_draws_pars)
+                out[:] = 0.
+                return np.log(np.mean(self.components[i].pdf(x['samples'])))
             # Marginalisation over parameters
             else:
                 i_p = i - self.augment
@@ -1007,10 +1434,10 @@ class HAMM(AMM):
                             log_p[j] = np.log(np.mean(self.components[i].model(x['samples'], *p, *sp).flatten()/self.components[i].alpha))
                 else:
                     log_p = self.evaluated_logL[pt_id][i]
-                log_total_p = np.atleast_1d(np.sum([self.evaluated_logL[pt][i] for pt in range(int(np.sum(self.n_pts))) if self.assignations[pt] == i], axis = 0))
-                denom       = logsumexp(log_total_p)
-                v           = logsumexp(log_p + log_total_p)
-                return np.nan_to_num(v - denom, nan = -np.inf, neginf = -np.inf), log_p
+                out[:]             = log_p
+                log_total_p, denom = self._get_log_total_p(i)
+                v                  = _logsumexp(log_p + log_total_p)
+                return np.nan_to_num(v - denom, nan = -np.inf, neginf = -np.inf)
 
     def _log_predictive_mixture(self, x, logL_x = None):
         """
@@ -1022,28 +1449,22 @@ class HAMM(AMM):
         Returns:
             double: log Likelihood
         """
-        scores = np.zeros(self.nonpar.n_cl + 1)
         if x['logL_x'] is None:
             if self.dim == 1:
                 logL_x = evaluate_mixture_MC_draws_1d(self.nonpar.mu_MC, self.nonpar.sigma_MC, x['mix'].means, x['mix'].covs, x['mix'].w) - self.nonpar.log_alpha_factor
             else:
                 logL_x = evaluate_mixture_MC_draws(self.nonpar.mu_MC, self.nonpar.sigma_MC, x['mix'].means, x['mix'].covs, x['mix'].w) - self.nonpar.log_alpha_factor
-            x['logL_x'] = logL_x
+            x['logL_x']     = logL_x
+            x['log_norm_x'] = _logsumexp(logL_x)
         else:
             logL_x = x['logL_x']
-        for j, i in enumerate(list(np.arange(self.nonpar.n_cl)) + ["new"]):
-            if i == "new":
-                ss     = None
-                logL_D = np.zeros(self.nonpar.MC_draws)
-            else:
-                ss     = self.nonpar.mixture[i]
-                logL_D = ss.logL_D
-            scores[j] = logsumexp(logL_D + logL_x) - logsumexp(logL_D)
-            if ss is None:
-                scores[j] += np.log(self.nonpar.alpha) - np.log(self.nonpar.n_pts + self.nonpar.alpha)
-            else:
-                scores[j] += np.log(ss.N) - np.log(self.nonpar.n_pts + self.nonpar.alpha)
-        return logsumexp(scores)
+        n_cl     = self.nonpar.n_cl
+        log_pred = np.empty(n_cl)
+        N        = np.empty(n_cl)
+        for i, ss in enumerate(self.nonpar.mixture[:n_cl]):
+            N[i]        = ss.N
+            log_pred[i] = _logsumexp(ss.logL_D + logL_x) - self._log_norm_D(i, ss.logL_D)
+        return _log_predictive_dp(log_pred, N, x['log_norm_x'] - np.log(self.nonpar.MC_draws), self.nonpar.alpha, self.nonpar.n_pts)
     
     def add_new_point(self, ev):
         """
@@ -1053,8 +1474,9 @@ class HAMM(AMM):
             np.ndarray ev: event
         """
         x = {'samples': ev[0],
-             'mix': np.random.choice(ev[1]),
+             'mix': self._rng.choice(ev[1]),
              'logL_x': None,
+             'log_norm_x': None,
              }
         self.stored_pts[int(np.sum(self.n_pts))] = x
         self._assign_to_component(x, pt_id = int(np.sum(self.n_pts)))
@@ -1069,21 +1491,13 @@ class HAMM(AMM):
             int id_nonpar: FIGARO id for the point
             bool reassign: wheter the point is new or is being reassigned
         """
-        scores             = np.zeros(self.n_components)
-        vals               = np.zeros(shape = (self.n_components, self.n_draws_pars))
         for i in range(self.n_components):
-            score, vals[i] = self._log_predictive_likelihood(x, i, pt_id)
-            scores[i]      = score + np.log(self.gamma0[i] + self.n_pts[i])
+            self._scores_buf[i] = self._log_predictive_likelihood(x, i, pt_id, out = self._vals_buf[i])
         if np.sum(self.n_pts) == 0 and self.augment:
             id = 0
         else:
-            if len(scores) > 1:
-                scores             = np.exp(scores - logsumexp(scores))
-            else:
-                scores = [1.]
-            id                 = np.random.choice(self.n_components, p = scores)
-        self.n_pts[id]    += 1
-        self.weights       = (self.n_pts + self.gamma0)/np.sum(self.n_pts + self.gamma0)
+            id = _categorical_from_logits(self._scores_buf, self._log_counts, self._next_gumbel())
+        self._add_to_count(id, 1)
         # If DPGMM, updates mixture
         if self.augment and id == 0:
             if id_nonpar is None:
@@ -1093,7 +1507,8 @@ class HAMM(AMM):
                 self._reassign_point_nonpar(x['mix'], id_nonpar, x['logL_x'])
         # Parameter estimation
         elif self.par_bounds is not None:
-            self.evaluated_logL[pt_id] = vals
+            self.evaluated_logL[pt_id] = self._vals_buf.copy()
+            self._update_log_total_p(id, self.evaluated_logL[pt_id][id], 1)
         self.assignations[pt_id]       = int(id)
     
     def _reassign_point(self, id):
@@ -1106,11 +1521,13 @@ class HAMM(AMM):
         x                     = self.stored_pts[id]
         cid                   = self.assignations[id]
         id_nonpar             = None
-        self.n_pts[cid]      -= 1
+        self._add_to_count(cid, -1)
         self.assignations[id] = None
         if self.augment and cid == 0:
             id_nonpar  = self.ids_nonpar[id]
             self.nonpar._remove_from_cluster(x, self.nonpar.assignations[id_nonpar], self.nonpar.evaluated_logL[id_nonpar])
+        elif self.par_bounds is not None:
+            self._update_log_total_p(cid, self.evaluated_logL[id][cid], -1)
         self._assign_to_component(x, id, id_nonpar = id_nonpar, reassign = True)
 
     def _reassign_point_nonpar(self, x, id_nonpar, logL_x):
@@ -0,0 +1,115 @@
+from math import erf, exp, log, pi, sqrt
+from numba import vectorize
+from numba.np.ufunc.dufunc import DUFunc
+
+from anubis.exceptions import ANUBISException
+
+# Compiled ufuncs: the parameters broadcast against x, so that all the parameter draws can be evaluated in a single call
+
+@vectorize(['float64(float64, float64, float64)'], cache = True)
+def gaussian(x, mu, sigma):
+    """
+    Gaussian distribution.
+
+    Arguments:
+        np.ndarray x: point(s) to evaluate the pdf at
+        double mu:    mean
+        double sigma: standard deviation
+
+    Returns:
+        np.ndarray: pdf
+    """
+    return exp(-0.5*((x - mu)/sigma)**2)/(sqrt(2*pi)*sigma)
+
+@vectorize(['float64(float64, float64, float64, float64, float64)'], cache = True)
+def truncated_gaussian(x, mu, sigma, xmin, xmax):
+    """
+    Gaussian distribution truncated to [xmin, xmax].
+
+    Arguments:
+        np.ndarray x: point(s) to evaluate the pdf at
+        double mu:    mean
+        double sigma: standard deviation
+        double xmin:  lower bound
+        double xmax:  upper bound
+
+    Returns:
+        np.ndarray: pdf
+    """
+    if x < xmin or x > xmax:
+        return 0.
+    norm = 0.5*(erf((xmax - mu)/(sqrt(2)*sigma)) - erf((xmin - mu)/(sqrt(2)*sigma)))
+    return exp(-0.5*((x - mu)/sigma)**2)/(sqrt(2*pi)*sigma*norm)
+
+@vectorize(['float64(float64, float64, float64, float64)'], cache = True)
+def power_law(x, alpha, xmin, xmax):
+    """
+    Power-law distribution x^alpha between xmin and xmax (0 < xmin < xmax).
+
+    Arguments:
+        np.ndarray x: point(s) to evaluate the pdf at
+        double alpha: slope
+        double xmin:  lower bound
+        double xmax:  upper bound
+
+    Returns:
+        np.ndarray: pdf
+    """
+    if x < xmin or x > xmax:
+        return 0.
+    if alpha == -1.:
+        return 1./(x*log(xmax/xmin))
+    return (alpha + 1.)*x**alpha/(xmax**(alpha + 1.) - xmin**(alpha + 1.))
+
+@vectorize(['float64(float64, float64, float64)'], cache = True)
+def uniform(x, xmin, xmax):
+    """
+    Uniform distribution between xmin and xmax.
+
+    Arguments:
+        np.ndarray x: point(s) to evaluate the pdf at
+        double xmin:  lower bound
+        double xmax:  upper bound
+
+    Returns:
+        np.ndarray: pdf
+    """
+    if x < xmin or x > xmax:
+        return 0.
+    return 1./(xmax - xmin)
+
+builtin_models = {'gaussian':           gaussian,
+                  'truncated_gaussian': truncated_gaussian,
+                  'power_law':          power_law,
+                  'uniform':            uniform,
+                  }
+
+def get_model(model):
+    """
+    Returns the model pdf: strings are looked up among the builtin models, callables are returned as they are.
+
+    Arguments:
+        str or callable model: name of a builtin model or model pdf
+
+    Returns:
+        callable: model pdf
+    """
+    if not isinstance(model, str):
+        return model
+    try:
+        return builtin_models[model]
+    except KeyError:
+        raise ANUBISException("Unknown builtin model {0}. Available models: {1}".format(model, ', '.join(builtin_models)))
+
+def is_builtin(model):
+    """
+    Checks whether a model is one of the builtin models.
+    The check is made by name rather than identity, so that copies of the builtin ufuncs (deep-copied or unpickled, e.g. in a worker process) are recognised as well.
+
+    Arguments:
+        callable model: model pdf
+
+    Returns:
+        bool: whether the model is a builtin model
+    """
+    return isinstance(model, DUFunc) and getattr(model, '__name__', None) in builtin_models
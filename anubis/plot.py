@@ -65,23 +65,26 @@ def plot_parametric(draws, injected = None, samples = None, bounds = None, out_f
     if len(np.shape(bounds)) > 1:
         bounds = bounds[0]
     
-    all_bounds = np.atleast_2d([d.bounds[0] for d in draws])
-    x_min = np.max(all_bounds[:,0])
-    x_max = np.min(all_bounds[:,1])
+    probit = draws[0].probit
+    x_min  = np.max(np.fromiter((d.bounds[0,0] for d in draws), dtype = np.float64, count = len(draws)))
+    x_max  = np.min(np.fromiter((d.bounds[0,1] for d in draws), dtype = np.float64, count = len(draws)))
     
     if bounds is not None:
-        if not bounds[0] >= x_min and probit:
-            warnings.warn("The provided lower bound is invalid for at least one draw. {0} will be used instead.".format(x_min))
+        # With the probit transformation, the draws are not defined outside their bounds
+        if probit and (bounds[0] < x_min or bounds[1] > x_max):
+            x_min = max(x_min, bounds[0])
+            x_max = min(x_max, bounds[1])
+            warnings.warn("The provided bounds are invalid for at least one draw. [{0}, {1}] will be used instead.".format(x_min, x_max))
         else:
-            x_min = bounds[0]
-        if not bounds[1] <= x_max and probit:
-            warnings.warn("The provided upper bound is invalid for at least one draw. {0} will be used instead.".format(x_max))
-        else:
-            x_max = bounds[1]
+            x_min, x_max = bounds[0], bounds[1]
     
     x    = np.linspace(x_min, x_max, n_pts)
     dx   = x[1]-x[0]
-    probs = np.array([d.pdf_parametric(x) for d in draws])
+    pdf_parametric_batch = getattr(draws[0], 'pdf_parametric_batch', None)
+    if pdf_parametric_batch is not None:
+        probs = pdf_parametric_batch(x, draws)
+    else:
+        probs = np.array([d.pdf_parametric(x) for d in draws])
     
     figaro_plot_1d_dist(x                = x,
                         draws            = probs,
@@ -209,38 +212,51 @@ def plot_samples(draws, plot = 'joint', out_folder = '.', models = None, true_pa
                 # Avoids issue with parallelisation
                 pass
 
+    # Samples and labels are extracted from the draws once, only for the required plots.
+    # If the joint plot is required, the parameter and weight plots use column slices of the joint array
+    if plot in ['joint', 'all']:
+        samples_joint   = get_samples_and_weights(draws)
+        n_weights       = len(draws[0].intrinsic_weights)
+        samples_pars    = samples_joint[:, :-n_weights]
+        samples_weights = samples_joint[:, -n_weights:]
+    elif plot == 'pars':
+        samples_pars    = get_samples(draws)
+    else:
+        samples_weights = get_weights(draws)
+    all_labels = get_labels(draws, 'all', models)
+
     if plot in ['pars', 'all']:
-        samples = get_samples(draws)
+        samples = samples_pars
         if name is not None:
             plot_name = name + '_pars.pdf'
         else:
             plot_name = 'parameters.pdf'
         
-        parameter_labels = get_labels(draws, 'pars', models)
+        parameter_labels = all_labels['pars']
         c = corner(samples, labels = parameter_labels, truths = true_pars, quantiles = [0.16, 0.5, 0.84], show_titles = True, quiet = True)
         c.savefig(Path(out_folder, plot_name), bbox_inches = 'tight')
         plt.close(c)
 
     if plot in ['weights', 'all']:
-        samples = get_weights(draws)
+        samples = samples_weights
         if name is not None:
             plot_name = name + '_weights.pdf'
         else:
             plot_name = 'weights.pdf'
         
-        weights_labels = get_labels(draws, 'weights', models)
+        weights_labels = all_labels['weights']
         c = corner(samples, labels = weights_labels, truths = true_weights, quantiles = [0.16, 0.5, 0.84], show_titles = True, quiet = True)
         c.savefig(Path(out_folder, plot_name), bbox_inches = 'tight')
         plt.close(c)
 
     if plot in ['joint', 'all']:
-        samples  = get_samples_and_weights(draws)
+        samples  = samples_joint
         if name is not None:
             plot_name = name + '_joint.pdf'
         else:
             plot_name = 'joint.pdf'
 
-        joint_labels = get_labels(draws, 'joint', models = models)
+        joint_labels = all_labels['joint']
         if true_pars is None:
             true_pars = [None for _ in range(len(joint_labels) - len(models) - draws[0].augment)]
         if true_weights is None:
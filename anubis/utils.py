@@ -1,4 +1,5 @@
 import numpy as np
+from collections import Counter
 from anubis.exceptions import ANUBISException
 
 def get_samples(draws):
@@ -46,10 +47,10 @@ def get_labels(draws, kind, models = None):
     
     Arguments:
         :iterable draws:               instances of het_mixture class
-        :str kind:                     whether to produce labels for plots ('pars', 'weights', 'joint') or for output ('save')
+        :str kind:                     whether to produce labels for plots ('pars', 'weights', 'joint'), all of them at once ('all') or for output ('save')
     
     Return:
-        :list-of-str: labels
+        :list-of-str: labels (dict of lists with keys 'pars', 'weights' and 'joint' if kind is 'all')
     """
     if models is not None:
         # Check that all models have the correct attributes
@@ -60,15 +61,16 @@ def get_labels(draws, kind, models = None):
                 model['par_labels'] = []
         all_pars_names  = [lab for model in models for lab in model['par_names']]
         all_pars_labels = [lab for model in models for lab in model['par_labels']]
-        # Fancy way of getting all unique instances while preserving order
-        unique_names  = list(dict.fromkeys(all_pars_names).keys())
-        unique_labels = list(dict.fromkeys(all_pars_labels).keys())
+        # All unique instances, preserving order
+        seen          = set()
+        unique_names  = [x for x in all_pars_names if not (x in seen or seen.add(x))]
+        seen          = set()
+        unique_labels = [x for x in all_pars_labels if not (x in seen or seen.add(x))]
         # Identify items appearing once
-        d_names = {}
-        for i in all_pars_names: d_names[i] = i in d_names
+        count_names = Counter(all_pars_names)
         # List of names and labels
-        pars_names        = [k for k in all_pars_names if not d_names[k]] + [k for k in unique_names if d_names[k]]
-        pars_labels       = [x for x, k in zip(all_pars_labels, all_pars_names) if not d_names[k]] + [x for x, k in zip(unique_labels, unique_names) if d_names[k]]
+        pars_names        = [k for k in all_pars_names if count_names[k] == 1] + [k for k in unique_names if count_names[k] > 1]
+        pars_labels       = [x for x, k in zip(all_pars_labels, all_pars_names) if count_names[k] == 1] + [x for x, k in zip(unique_labels, unique_names) if count_names[k] > 1]
         par_models_labels = [model['name'] for model in models]
     # Number of parameters and models
     if draws[0].n_shared_pars > 0:
@@ -96,10 +98,12 @@ def get_labels(draws, kind, models = None):
         return weights_labels
     elif kind == 'joint':
         return parameter_labels + weights_labels
+    elif kind == 'all':
+        return {'pars': parameter_labels, 'weights': weights_labels, 'joint': parameter_labels + weights_labels}
     elif kind == 'save':
         # Remove LaTeX characters from string
         labels = pars_names + [s.translate(str.maketrans({st:'' for st in '$\{}'})) for s in weights_labels]
         labels = [s.replace('mathrm', '') for s in labels]
         return labels
     else:
-        raise ANUBISException("Kind not supported. Please pick from ['pars', 'weights', 'joint', 'save']")
+        raise ANUBISException("Kind not supported. Please pick from ['pars', 'weights', 'joint', 'all', 'save']")
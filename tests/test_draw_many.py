@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+
+from anubis.exceptions import ANUBISException
+from anubis.mixture import AMM
+
+bounds     = [[-5, 5]]
+par_bounds = [[[-2, 2], [0.3, 3]]]
+samples    = np.random.default_rng(1).normal(0, 1, size = 50)
+
+def make_mix(models):
+    return AMM(models, bounds, par_bounds = par_bounds, n_draws_pars = 50, n_reassignments = 20, n_steps_mcmc = 10, augment = False)
+
+@pytest.mark.parametrize('n_processes', [1, 2])
+def test_draw_many(n_processes):
+    draws = make_mix(['gaussian']).draw_many(samples, 2, n_processes = n_processes, seed = 1)
+    assert len(draws) == 2
+    for d in draws:
+        assert np.isclose(np.sum(d.weights), 1.)
+        assert np.all(np.isfinite(d.pdf(np.linspace(-4, 4, 5))))
+
+def test_draw_many_unpicklable():
+    mix = make_mix([lambda x, mu, sigma: np.exp(-0.5*((x - mu)/sigma)**2)/(np.sqrt(2*np.pi)*sigma)])
+    with pytest.raises(ANUBISException):
+        mix.draw_many(samples, 2, n_processes = 2)
+    assert len(mix.draw_many(samples, 2, n_processes = 1)) == 2
+
+def test_draw_many_restores_rng():
+    def failing_model(x, mu, sigma):
+        raise RuntimeError
+    mix = make_mix([failing_model])
+    rng = mix._rng
+    with pytest.raises(RuntimeError):
+        mix.draw_many(samples, 2, n_processes = 1)
+    assert mix._rng is rng
@@ -0,0 +1,16 @@
+import pickle
+from copy import deepcopy
+
+from anubis.models import gaussian, is_builtin
+from anubis.mixture import par_model
+
+def test_builtin_copies_are_vectorised():
+    for model in [gaussian, deepcopy(gaussian), pickle.loads(pickle.dumps(gaussian))]:
+        assert is_builtin(model)
+        assert par_model(model, [0., 1.], [[-5, 5]], False, False).vectorised
+
+def test_user_model_not_vectorised():
+    def gaussian(x, mu, sigma):
+        return x
+    assert not is_builtin(gaussian)
+    assert not par_model(gaussian, [0., 1.], [[-5, 5]], False, False).vectorised
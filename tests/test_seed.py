@@ -0,0 +1,20 @@
+import numpy as np
+
+from anubis.mixture import AMM
+
+samples = np.random.default_rng(1).normal(0, 1, size = 40)
+
+def draw(**kwargs):
+    mix = AMM(['gaussian', 'uniform'], [[-5, 5]], par_bounds = [[[-2, 2], [0.3, 3]], [[-5, -4], [4, 5]]], n_draws_pars = 30, n_reassignments = 20, n_steps_mcmc = 10, augment = False, **kwargs)
+    d   = mix.density_from_samples(samples)
+    return np.concatenate([d.weights] + [m.pars for m in d.models])
+
+def test_seed():
+    assert np.array_equal(draw(seed = 3), draw(seed = 3))
+
+def test_global_seed():
+    # Without a seed, the sampler follows np.random.seed
+    np.random.seed(5)
+    first = draw()
+    np.random.seed(5)
+    assert np.array_equal(first, draw())
@@ -0,0 +1,30 @@
+import numpy as np
+
+from anubis.mixture import AMM
+from anubis._likelihood import _population_log_likelihood
+
+samples = np.random.default_rng(1).normal(0, 1, size = 40)
+
+def selection_function(x):
+    # Elementwise: returns the same shape as x, e.g. (n, 1) for a block of 1d samples
+    return 1./(1. + np.exp(-x))
+
+def make_mix():
+    return AMM(['gaussian'], [[-5, 5]], par_bounds = [[[-2, 2], [0.3, 3]]], n_draws_pars = 30, n_reassignments = 20, n_steps_mcmc = 10, selection_function = selection_function, augment = False)
+
+def test_density_from_samples_selection_function():
+    d = make_mix().density_from_samples(samples)
+    assert np.isclose(np.sum(d.weights), 1.)
+    assert np.all(np.isfinite(d.pdf(np.linspace(-4, 4, 5))))
+
+def test_population_log_likelihood_selection_function():
+    mix  = make_mix()
+    pts  = samples[:, np.newaxis]
+    pars = np.array([0.5, 1.2])
+    # One value per point from a single call, with no (n, n) intermediate
+    assert mix.components[0]._model(pts, pars, []).shape == (len(pts),)
+    mix.assigned_pts    = {0: pts}
+    mix.model_to_sample = 0
+    logL = _population_log_likelihood(pars, mix)
+    L    = np.array([mix.components[0]._model(pt, pars, []) for pt in pts[:, np.newaxis]]).flatten()
+    assert np.isclose(logL, np.sum(np.log(L)) - len(pts)*np.log(mix.components[0].alpha))